@@ -0,0 +1,59 @@
+"""
+Precompute Dashboard Aggregations
+=================================
+Creates the indexes the dashboard relies on, then runs its static aggregation
+pipelines once and stores their results in the `dashboard_cache` collection,
+so the dashboard can serve them with a single `find_one` instead of
+re-aggregating the MFlix collections.
+
+Usage:
+    python scripts/precompute_stats.py
+"""
+
+import os
+import sys
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from streamlit_dashboard import (
+    CACHE_COLLECTION,
+    MATERIALIZED_AGGREGATIONS,
+    ensure_indexes,
+    get_database_connection,
+    pipeline_hash,
+)
+
+
+def main():
+    db = get_database_connection()
+    if db is None:
+        print("❌ Failed to connect to database.")
+        sys.exit(1)
+
+    for failure in ensure_indexes(db):
+        print(f"⚠️ {failure}")
+
+    for name, (collection, pipeline) in MATERIALIZED_AGGREGATIONS.items():
+        fingerprint = pipeline_hash(pipeline)
+        if callable(pipeline):
+            pipeline = pipeline(db)
+        data = list(db[collection].aggregate(pipeline))
+        db[CACHE_COLLECTION].replace_one(
+            {'_id': name},
+            {'_id': name, 'data': data, 'pipeline_hash': fingerprint,
+             'updated_at': datetime.utcnow()},
+            upsert=True
+        )
+        print(f"✅ {name}: {len(data)} rows")
+
+    # Drop results for aggregations that no longer exist
+    removed = db[CACHE_COLLECTION].delete_many(
+        {'_id': {'$nin': list(MATERIALIZED_AGGREGATIONS)}}
+    ).deleted_count
+    if removed:
+        print(f"🧹 Removed {removed} obsolete entries")
+
+
+if __name__ == "__main__":
+    main()
@@ -21,11 +21,27 @@ import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import folium
+from folium.plugins import FastMarkerCluster
 from streamlit_folium import folium_static
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from pathlib import Path
+import functools
+import gzip
+import hashlib
+import inspect
+import os
+import pickle
+import tempfile
+import time
 import warnings
 warnings.filterwarnings('ignore')
 
+try:
+    from pymongoarrow.api import Schema, aggregate_pandas_all
+except ImportError:  # optional: fall back to building DataFrames from dicts
+    Schema = aggregate_pandas_all = None
+
 # Page configuration
 st.set_page_config(
     page_title="MFlix Analytics Dashboard",
@@ -56,6 +72,45 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+def ensure_indexes(db):
+    """Create the indexes used by the dashboard pipelines (no-op if they exist)
+
+    Returns a list of failure messages. Raises ConnectionFailure as soon as the
+    server is unreachable rather than waiting out the timeout for every index.
+    """
+    indexes = {
+        'movies': [
+            [('imdb.rating', -1), ('imdb.votes', -1)],
+            [('year', 1)],
+            [('genres', 1)],
+            [('title', 'text')]
+        ],
+        'comments': [
+            [('date', 1)],
+            [('movie_id', 1)]
+        ],
+        'theaters': [
+            [('location.address.state', 1)]
+        ]
+    }
+    failures = []
+    for collection, keys_list in indexes.items():
+        for keys in keys_list:
+            try:
+                db[collection].create_index(keys)
+            except pymongo.errors.ConnectionFailure:
+                raise
+            except pymongo.errors.PyMongoError as e:
+                # Read-only users or unsupported index types shouldn't block setup
+                failures.append(f"Could not create index {keys} on {collection}: {e}")
+    return failures
+
+@st.cache_resource
+def ensure_dashboard_indexes(_db):
+    """Create the dashboard indexes once per process"""
+    for failure in ensure_indexes(_db):
+        st.warning(f"⚠️ {failure}")
+
 # Database connection with caching
 @st.cache_resource
 def get_database_connection():
@@ -68,7 +123,14 @@ def get_database_connection():
             tlsAllowInvalidCertificates=True,
             serverSelectionTimeoutMS=60000,
             connectTimeoutMS=60000,
-            socketTimeoutMS=60000
+            socketTimeoutMS=60000,
+            # Compress aggregation results on the wire; zlib if zstd is unavailable
+            compressors='zstd,zlib',
+            zlibCompressionLevel=6,
+            # Small warm pool so cache misses skip the TLS handshake
+            maxPoolSize=16,
+            minPoolSize=4,
+            appname='mflix-dashboard'
         )
         # Note: database name is case-sensitive - use lowercase 'sample_mflix'
         db = client['sample_mflix']
@@ -77,23 +139,309 @@ def get_database_connection():
         st.error(f"Database connection failed: {e}")
         return None
 
+# Disk cache so loader results survive process restarts
+CACHE_DIR = Path(__file__).parent / '.cache'
+# Any change to this module invalidates entries written by a previous version
+CODE_VERSION = hashlib.sha1(Path(__file__).read_bytes()).hexdigest()
+
+def _atomic_write(path, write):
+    """Write via a temp file and os.replace so readers never see a partial file"""
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    os.close(fd)
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def _write_pickle(result, path):
+    with gzip.open(path, 'wb') as f:
+        pickle.dump(result, f)
+
+def _prune_disk_cache(ttl):
+    """Delete cache entries that have expired or were written by another code version"""
+    now = time.time()
+    for path in CACHE_DIR.iterdir():
+        try:
+            if path.suffix == '.tmp':
+                # In-flight writes of other threads are young; only drop abandoned ones
+                stale = now - path.stat().st_mtime >= ttl
+            else:
+                stale = (not path.name.startswith(CODE_VERSION)
+                         or now - path.stat().st_mtime >= ttl)
+            if stale:
+                path.unlink(missing_ok=True)
+        except OSError:
+            pass
+
+def disk_cache(ttl=3600):
+    """Persist a loader's result under CACHE_DIR (parquet for DataFrames, gzipped pickle otherwise)"""
+    def decorator(fn):
+        signature = inspect.signature(fn)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            # Like st.cache_data, underscore-prefixed arguments (e.g. _db) are not part of the key
+            key_args = {k: v for k, v in bound.arguments.items() if not k.startswith('_')}
+            key = hashlib.sha1((fn.__name__ + repr(key_args)).encode()).hexdigest()
+            parquet_path = CACHE_DIR / f"{CODE_VERSION}-{key}.parquet"
+            pickle_path = CACHE_DIR / f"{CODE_VERSION}-{key}.pkl.gz"
+
+            for path in (parquet_path, pickle_path):
+                if path.exists() and time.time() - path.stat().st_mtime < ttl:
+                    try:
+                        if path == parquet_path:
+                            return pd.read_parquet(path)
+                        with gzip.open(path, 'rb') as f:
+                            return pickle.load(f)
+                    except Exception:
+                        # Unreadable entry: recompute below and overwrite it
+                        pass
+
+            result = fn(*args, **kwargs)
+            try:
+                CACHE_DIR.mkdir(exist_ok=True)
+                _prune_disk_cache(ttl)
+                if isinstance(result, pd.DataFrame):
+                    try:
+                        _atomic_write(parquet_path, result.to_parquet)
+                        return result
+                    except Exception:
+                        # Columns parquet can't encode (e.g. ObjectId) fall back to pickle
+                        pass
+                _atomic_write(pickle_path, lambda tmp_path: _write_pickle(result, tmp_path))
+            except OSError:
+                pass
+            return result
+        return wrapper
+    return decorator
+
 # Data loading functions with caching
+def _collection_count(collection):
+    """Count documents from collection metadata, scanning only if unsupported"""
+    try:
+        return collection.estimated_document_count()
+    except pymongo.errors.OperationFailure:
+        return collection.count_documents({})
+
+def _shrink(df, cats=()):
+    """Downcast numeric columns and convert low-cardinality strings to category"""
+    for c in df.select_dtypes('integer'):
+        df[c] = pd.to_numeric(df[c], downcast='unsigned' if df[c].min() >= 0 else 'integer')
+    for c in df.select_dtypes('float'):
+        df[c] = pd.to_numeric(df[c], downcast='float')
+    for c in cats:
+        if c in df:
+            df[c] = df[c].astype('category')
+    return df
+
+def _aggregate_frame(collection, pipeline, schema=None):
+    """Run a pipeline straight into a DataFrame, via Arrow when pymongoarrow is installed"""
+    if aggregate_pandas_all is not None:
+        return aggregate_pandas_all(collection, pipeline,
+                                    schema=Schema(schema) if schema else None)
+    return pd.DataFrame(list(collection.aggregate(pipeline)))
+
+# Precomputed aggregations written by scripts/precompute_stats.py
+CACHE_COLLECTION = 'dashboard_cache'
+TOP_RATED_PRECOMPUTE_LIMIT = 100
+
+MOVIE_FACETS_PIPELINE = [
+    {"$facet": {
+        "avg_rating": [
+            {"$match": {"imdb.rating": {"$exists": True, "$ne": None}}},
+            {"$group": {"_id": None, "avg_rating": {"$avg": "$imdb.rating"}}}
+        ],
+        "genres": [
+            {"$match": {"genres": {"$exists": True, "$ne": []}}},
+            {"$unwind": "$genres"},
+            {"$group": {"_id": "$genres", "count": {"$sum": 1}}},
+            {"$sort": {"count": -1}},
+            {"$limit": 20}
+        ],
+        "ratings": [
+            {"$match": {"imdb.rating": {"$exists": True, "$ne": None}}},
+            {"$project": {"_id": 0, "rating": "$imdb.rating"}},
+            {"$limit": 10000}
+        ],
+        "decades": [
+            {"$match": {"year": {"$exists": True, "$ne": None, "$gte": 1900}}},
+            {"$project": {"decade": {"$subtract": ["$year", {"$mod": ["$year", 10]}]}}},
+            {"$group": {"_id": "$decade", "count": {"$sum": 1}}},
+            {"$sort": {"_id": 1}}
+        ]
+    }}
+]
+
+GENRE_RATINGS_PIPELINE = [
+    # Restrict to movies with a meaningful number of votes before $unwind fans out
+    {"$match": {
+        "imdb.votes": {"$gte": 100},
+        "imdb.rating": {"$exists": True, "$ne": None},
+        "genres": {"$exists": True, "$ne": []}
+    }},
+    {"$unwind": "$genres"},
+    {"$group": {
+        "_id": "$genres",
+        "avg_rating": {"$avg": "$imdb.rating"},
+        "count": {"$sum": 1}
+    }},
+    {"$match": {"count": {"$gte": 50}}},
+    {"$sort": {"avg_rating": -1}},
+    {"$limit": 15}
+]
+
+COMMENT_TREND_YEARS = 10
+
+def comment_trend_cutoff(db):
+    """Start of the comment trend window, or None if no comment has a date"""
+    # Anchor the window to the newest comment (an index seek), not the wall clock,
+    # so static datasets still get a full window
+    newest = db['comments'].find_one({"date": {"$exists": True}}, {"date": 1},
+                                     sort=[("date", -1)])
+    return datetime(newest['date'].year - COMMENT_TREND_YEARS, 1, 1) if newest else None
+
+def comment_facets_pipeline(db):
+    """Build the comment $facet pipeline; trends cover COMMENT_TREND_YEARS, most discussed is all-time"""
+    cutoff = comment_trend_cutoff(db)
+    trend_match = {"date": {"$gte": cutoff}} if cutoff else {"date": {"$exists": True}}
+    return [
+        {"$facet": {
+            "trends": [
+                {"$match": trend_match},
+                {"$project": {
+                    "year": {"$year": "$date"},
+                    "month": {"$month": "$date"}
+                }},
+                {"$group": {
+                    "_id": {"year": "$year", "month": "$month"},
+                    "count": {"$sum": 1}
+                }},
+                {"$sort": {"_id.year": 1, "_id.month": 1}},
+                {"$project": {
+                    "_id": 0,
+                    "date": {"$dateFromParts": {"year": "$_id.year", "month": "$_id.month", "day": 1}},
+                    "Comments": "$count"
+                }}
+            ],
+            "most_discussed": [
+                {"$group": {"_id": "$movie_id", "comment_count": {"$sum": 1}}},
+                {"$sort": {"comment_count": -1}},
+                {"$limit": 10},
+                {"$lookup": {
+                    "from": "movies",
+                    "localField": "_id",
+                    "foreignField": "_id",
+                    "as": "movie_info"
+                }},
+                {"$unwind": "$movie_info"},
+                {"$project": {
+                    "_id": 0,
+                    "title": "$movie_info.title",
+                    "year": "$movie_info.year",
+                    "comment_count": 1
+                }}
+            ]
+        }}
+    ]
+
+def top_rated_pipeline(limit):
+    """Build the top rated movies pipeline"""
+    return [
+        {"$match": {
+            "imdb.rating": {"$exists": True, "$ne": None},
+            "imdb.votes": {"$gte": 1000}
+        }},
+        {"$project": {
+            "title": 1,
+            "year": 1,
+            "genres": 1,
+            "genres_str": {"$reduce": {
+                "input": {"$ifNull": ["$genres", []]},
+                "initialValue": "",
+                "in": {"$concat": [
+                    "$$value",
+                    {"$cond": [{"$eq": ["$$value", ""]}, "", ", "]},
+                    "$$this"
+                ]}
+            }},
+            "rating": "$imdb.rating",
+            "votes": "$imdb.votes"
+        }},
+        {"$sort": {"rating": -1}},
+        {"$limit": limit}
+    ]
+
+# name -> (collection, pipeline or pipeline(db) builder) for every aggregation served from CACHE_COLLECTION
+MATERIALIZED_AGGREGATIONS = {
+    'movie_facets': ('movies', MOVIE_FACETS_PIPELINE),
+    'genre_ratings': ('movies', GENRE_RATINGS_PIPELINE),
+    'top_rated_movies': ('movies', top_rated_pipeline(TOP_RATED_PRECOMPUTE_LIMIT)),
+    'comment_facets': ('comments', comment_facets_pipeline)
+}
+
+def _builder_source(fn, seen=None):
+    """Source of a pipeline builder plus the module constants and helpers it reads"""
+    seen = set() if seen is None else seen
+    seen.add(fn.__name__)
+    parts = [inspect.getsource(fn)]
+    for name in fn.__code__.co_names:
+        value = fn.__globals__.get(name)
+        if isinstance(value, (int, float, str, tuple, list, dict)):
+            parts.append(f"{name}={value!r}")
+        elif (inspect.isfunction(value) and value.__module__ == fn.__module__
+              and name not in seen):
+            parts.append(_builder_source(value, seen))
+    return '\n'.join(parts)
+
+def pipeline_hash(pipeline):
+    """Fingerprint a pipeline (or a pipeline builder and its inputs) to detect stale results"""
+    source = _builder_source(pipeline) if callable(pipeline) else repr(pipeline)
+    return hashlib.sha1(source.encode()).hexdigest()
+
+def _aggregate_materialized(_db, name, pipeline=None):
+    """Read a precomputed aggregation, falling back to running the pipeline live"""
+    collection, default_pipeline = MATERIALIZED_AGGREGATIONS[name]
+    # Only results written by the current pipeline definition are served; `updated_at`
+    # is informational since the MFlix data is static (re-run the script to refresh)
+    doc = _db[CACHE_COLLECTION].find_one({'_id': name,
+                                          'pipeline_hash': pipeline_hash(default_pipeline)})
+    if doc is not None:
+        return doc['data']
+    pipeline = pipeline or default_pipeline
+    if callable(pipeline):
+        pipeline = pipeline(_db)
+    return list(_db[collection].aggregate(pipeline))
+
+@st.cache_data(ttl=3600)
+@disk_cache(ttl=3600)
+def get_movie_facets(_db):
+    """Run the Overview movie aggregations in a single $facet round-trip"""
+    result = _aggregate_materialized(_db, 'movie_facets')
+    return result[0] if result else {}
+
 @st.cache_data(ttl=3600)
+@disk_cache(ttl=3600)
 def get_overview_stats(_db):
     """Get overview statistics"""
-    stats = {
-        'total_movies': _db['movies'].count_documents({}),
-        'total_users': _db['users'].count_documents({}),
-        'total_comments': _db['comments'].count_documents({}),
-        'total_theaters': _db['theaters'].count_documents({})
+    collections = {
+        'total_movies': 'movies',
+        'total_users': 'users',
+        'total_comments': 'comments',
+        'total_theaters': 'theaters'
     }
+    # Overlap the count round-trips with the movie $facet query
+    with ThreadPoolExecutor(max_workers=len(collections)) as executor:
+        futures = {key: executor.submit(_collection_count, _db[name])
+                   for key, name in collections.items()}
+        facets = get_movie_facets(_db)
+        stats = {key: future.result() for key, future in futures.items()}
     
     # Average rating
-    avg_rating_pipeline = [
-        {"$match": {"imdb.rating": {"$exists": True, "$ne": None}}},
-        {"$group": {"_id": None, "avg_rating": {"$avg": "$imdb.rating"}}}
-    ]
-    avg_rating = list(_db['movies'].aggregate(avg_rating_pipeline))
+    avg_rating = facets.get('avg_rating', [])
     stats['avg_rating'] = avg_rating[0]['avg_rating'] if avg_rating else 0
     
     return stats
@@ -101,106 +449,114 @@ def get_overview_stats(_db):
 @st.cache_data(ttl=3600)
 def get_genre_distribution(_db):
     """Get genre distribution"""
-    pipeline = [
-        {"$match": {"genres": {"$exists": True, "$ne": []}}},
-        {"$unwind": "$genres"},
-        {"$group": {"_id": "$genres", "count": {"$sum": 1}}},
-        {"$sort": {"count": -1}},
-        {"$limit": 20}
-    ]
-    data = list(_db['movies'].aggregate(pipeline))
-    return pd.DataFrame(data).rename(columns={'_id': 'Genre', 'count': 'Count'})
+    data = get_movie_facets(_db).get('genres', [])
+    return _shrink(pd.DataFrame(data).rename(columns={'_id': 'Genre', 'count': 'Count'}), cats=('Genre',))
 
 @st.cache_data(ttl=3600)
 def get_rating_distribution(_db):
     """Get IMDb rating distribution"""
-    pipeline = [
-        {"$match": {"imdb.rating": {"$exists": True, "$ne": None}}},
-        {"$project": {"rating": "$imdb.rating"}},
-        {"$limit": 10000}
-    ]
-    data = list(_db['movies'].aggregate(pipeline))
+    data = get_movie_facets(_db).get('ratings', [])
     return pd.DataFrame(data)
 
 @st.cache_data(ttl=3600)
 def get_movies_by_decade(_db):
     """Get movies released by decade"""
-    pipeline = [
-        {"$match": {"year": {"$exists": True, "$ne": None, "$gte": 1900}}},
-        {"$project": {"decade": {"$subtract": ["$year", {"$mod": ["$year", 10]}]}}},
-        {"$group": {"_id": "$decade", "count": {"$sum": 1}}},
-        {"$sort": {"_id": 1}}
-    ]
-    data = list(_db['movies'].aggregate(pipeline))
-    return pd.DataFrame(data).rename(columns={'_id': 'Decade', 'count': 'Count'})
+    data = get_movie_facets(_db).get('decades', [])
+    return _shrink(pd.DataFrame(data).rename(columns={'_id': 'Decade', 'count': 'Count'}))
 
 @st.cache_data(ttl=3600)
+@disk_cache(ttl=3600)
 def get_top_rated_movies(_db, limit=10):
     """Get top rated movies"""
-    pipeline = [
-        {"$match": {
-            "imdb.rating": {"$exists": True, "$ne": None},
-            "imdb.votes": {"$gte": 1000}
-        }},
-        {"$project": {
-            "title": 1,
-            "year": 1,
-            "genres": 1,
-            "rating": "$imdb.rating",
-            "votes": "$imdb.votes"
-        }},
-        {"$sort": {"rating": -1}},
-        {"$limit": limit}
-    ]
-    data = list(_db['movies'].aggregate(pipeline))
-    return pd.DataFrame(data)
+    if limit <= TOP_RATED_PRECOMPUTE_LIMIT:
+        data = _aggregate_materialized(_db, 'top_rated_movies', top_rated_pipeline(limit))[:limit]
+    else:
+        data = list(_db['movies'].aggregate(top_rated_pipeline(limit)))
+    return _shrink(pd.DataFrame(data))
+
+@st.cache_data(ttl=3600)
+@disk_cache(ttl=3600)
+def get_genre_ratings(_db):
+    """Get average rating and movie count per genre"""
+    data = _aggregate_materialized(_db, 'genre_ratings')
+    df = pd.DataFrame(data)
+    df.columns = ['Genre', 'Avg Rating', 'Movie Count']
+    return df
 
 @st.cache_data(ttl=3600)
+@disk_cache(ttl=3600)
 def get_theater_locations(_db):
     """Get theater locations"""
     pipeline = [
         {"$match": {"location.geo.coordinates": {"$exists": True}}},
         {"$project": {
+            "_id": 0,
             "city": "$location.address.city",
             "state": "$location.address.state",
-            "coordinates": "$location.geo.coordinates"
-        }},
-        {"$limit": 500}
+            # GeoJSON stores [longitude, latitude]
+            "lon": {"$arrayElemAt": ["$location.geo.coordinates", 0]},
+            "lat": {"$arrayElemAt": ["$location.geo.coordinates", 1]}
+        }}
     ]
-    data = list(_db['theaters'].aggregate(pipeline))
-    return data
+    df = _aggregate_frame(_db['theaters'], pipeline,
+                          schema={'city': str, 'state': str, 'lon': float, 'lat': float})
+    if df.empty:
+        return df
+    df = df.dropna(subset=['lat', 'lon']).astype({'lat': 'float32', 'lon': 'float32'})
+    return _shrink(df, cats=('state',))
+
+@st.cache_data(ttl=3600)
+@disk_cache(ttl=3600)
+def get_comment_facets(_db):
+    """Run the User Engagement comment aggregations in a single $facet round-trip"""
+    result = _aggregate_materialized(_db, 'comment_facets')
+    return result[0] if result else {}
+
+@st.cache_data(ttl=3600)
+def get_comment_trend_cutoff(_db):
+    """Get the start of the comment trend window"""
+    return comment_trend_cutoff(_db)
 
 @st.cache_data(ttl=3600)
 def get_comment_trends(_db):
     """Get comment activity over time"""
-    pipeline = [
-        {"$match": {"date": {"$exists": True}}},
-        {"$project": {
-            "year": {"$year": "$date"},
-            "month": {"$month": "$date"}
-        }},
-        {"$group": {
-            "_id": {"year": "$year", "month": "$month"},
-            "count": {"$sum": 1}
-        }},
-        {"$sort": {"_id.year": 1, "_id.month": 1}},
-        {"$limit": 100}
-    ]
-    data = list(_db['comments'].aggregate(pipeline))
+    data = get_comment_facets(_db).get('trends', [])
     if data:
-        df = pd.DataFrame(data)
-        df['date'] = pd.to_datetime(df['_id'].apply(lambda x: f"{x['year']}-{x['month']}-01"))
-        df = df.rename(columns={'count': 'Comments'})
-        return df[['date', 'Comments']]
+        return _shrink(pd.DataFrame(data, columns=['date', 'Comments']))
     return pd.DataFrame()
 
+@st.cache_data(ttl=3600)
+def get_most_discussed_movies(_db):
+    """Get the most commented movies"""
+    return get_comment_facets(_db).get('most_discussed', [])
+
+@st.cache_data(ttl=3600)
+@disk_cache(ttl=3600)
+def get_genres(_db):
+    """Get genre options for the search filter"""
+    return ['All'] + sorted(_db['movies'].distinct('genres'))
+
+@st.cache_resource
+def has_title_text_index(_db):
+    """Check once per process whether movies.title has a text index"""
+    try:
+        indexes = _db['movies'].index_information()
+    except pymongo.errors.OperationFailure:
+        return False
+    return any(kind == 'text' for info in indexes.values() for _, kind in info['key'])
+
 @st.cache_data(ttl=3600)
 def search_movies(_db, query, genre_filter=None, year_range=None):
     """Search movies by title"""
     match_condition = {}
+    use_text = bool(query) and has_title_text_index(_db)
     
     if query:
-        match_condition["title"] = {"$regex": query, "$options": "i"}
+        if use_text:
+            match_condition["$text"] = {"$search": query}
+        else:
+            # No text index available: case-insensitive title scan
+            match_condition["title"] = {"$regex": query, "$options": "i"}
     
     if genre_filter and genre_filter != "All":
         match_condition["genres"] = genre_filter
@@ -208,8 +564,10 @@ def search_movies(_db, query, genre_filter=None, year_range=None):
     if year_range:
         match_condition["year"] = {"$gte": year_range[0], "$lte": year_range[1]}
     
-    pipeline = [
-        {"$match": match_condition},
+    pipeline = [{"$match": match_condition}]
+    if use_text:
+        pipeline.append({"$sort": {"score": {"$meta": "textScore"}}})
+    pipeline += [
         {"$project": {
             "title": 1,
             "year": 1,
@@ -220,8 +578,9 @@ def search_movies(_db, query, genre_filter=None, year_range=None):
         {"$limit": 50}
     ]
     
+    # MFlix mixes types within year/rating, so build from dicts rather than an inferred Arrow schema
     data = list(_db['movies'].aggregate(pipeline))
-    return pd.DataFrame(data)
+    return _shrink(pd.DataFrame(data))
 
 # Main application
 def main():
@@ -235,6 +594,12 @@ def main():
         st.error("❌ Failed to connect to database. Please check your connection settings.")
         return
     
+    # Not cached when the server is unreachable, so the next rerun retries
+    try:
+        ensure_dashboard_indexes(db)
+    except pymongo.errors.ConnectionFailure as e:
+        st.warning(f"⚠️ Could not create indexes, server unreachable: {e}")
+    
     # Sidebar
     with st.sidebar:
         st.image("https://img.icons8.com/color/96/000000/movie-projector.png", width=100)
@@ -254,9 +619,14 @@ def main():
         **Data Source**: Azure Cosmos DB
         """)
     
+    # Overview statistics are shared by several pages; compute once per session
+    if 'overview_stats' not in st.session_state:
+        st.session_state['overview_stats'] = get_overview_stats(db)
+    stats = st.session_state['overview_stats']
+    
     # Page routing
     if page == "📊 Overview":
-        show_overview(db)
+        show_overview(db, stats)
     elif page == "🎬 Movie Analytics":
         show_movie_analytics(db)
     elif page == "📈 Temporal Trends":
@@ -264,17 +634,14 @@ def main():
     elif page == "🗺️ Geographic View":
         show_geographic_view(db)
     elif page == "💬 User Engagement":
-        show_user_engagement(db)
+        show_user_engagement(db, stats)
     elif page == "🔍 Search Movies":
         show_search(db)
 
-def show_overview(db):
+def show_overview(db, stats):
     """Overview page with key metrics"""
     st.header("📊 Platform Overview")
     
-    # Get statistics
-    stats = get_overview_stats(db)
-    
     # Display metrics
     col1, col2, col3, col4, col5 = st.columns(5)
     
@@ -297,16 +664,19 @@ def show_overview(db):
     with col1:
         st.subheader("🎭 Top Genres")
         genre_df = get_genre_distribution(db)
-        fig = px.bar(genre_df.head(10), x='Count', y='Genre', orientation='h',
-                     color='Count', color_continuous_scale='viridis')
+        top_genres = genre_df.head(10)
+        counts = top_genres['Count'].to_numpy(dtype='int32')
+        fig = px.bar(x=counts, y=top_genres['Genre'].to_numpy(), orientation='h',
+                     color=counts, color_continuous_scale='viridis',
+                     labels={'x': 'Count', 'y': 'Genre', 'color': 'Count'})
         fig.update_layout(height=400, showlegend=False)
         st.plotly_chart(fig, use_container_width=True)
     
     with col2:
         st.subheader("⭐ Rating Distribution")
         rating_df = get_rating_distribution(db)
-        fig = px.histogram(rating_df, x='rating', nbins=20,
-                          labels={'rating': 'IMDb Rating', 'count': 'Number of Movies'})
+        fig = px.histogram(x=rating_df['rating'].to_numpy(dtype='float32'), nbins=20,
+                          labels={'x': 'IMDb Rating', 'count': 'Number of Movies'})
         fig.update_layout(height=400, showlegend=False)
         st.plotly_chart(fig, use_container_width=True)
 
@@ -321,43 +691,25 @@ def show_movie_analytics(db):
         top_movies = get_top_rated_movies(db, limit=20)
         
         if not top_movies.empty:
-            top_movies['genres_str'] = top_movies['genres'].apply(lambda x: ', '.join(x) if isinstance(x, list) else '')
-            
-            # Display as a nice table
-            for idx, row in top_movies.iterrows():
-                col1, col2, col3 = st.columns([3, 1, 1])
-                with col1:
-                    st.write(f"**{idx+1}. {row['title']}** ({row['year']})")
-                    st.caption(row['genres_str'])
-                with col2:
-                    st.metric("Rating", f"{row['rating']:.1f}/10")
-                with col3:
-                    st.metric("Votes", f"{row['votes']:,}")
-                st.markdown("---")
+            # Display as a single table
+            table = top_movies[['title', 'year', 'genres_str', 'rating', 'votes']]
+            table.index = range(1, len(table) + 1)
+            st.dataframe(
+                table,
+                use_container_width=True,
+                column_config={
+                    'title': 'Title',
+                    'year': st.column_config.NumberColumn('Year', format="%d"),
+                    'genres_str': 'Genres',
+                    'rating': st.column_config.NumberColumn('Rating', format="%.1f/10"),
+                    'votes': st.column_config.NumberColumn('Votes', format="%d")
+                }
+            )
     
     with tab2:
         st.subheader("📊 Genre Performance")
         
-        # Genre rating analysis
-        pipeline = [
-            {"$match": {
-                "genres": {"$exists": True, "$ne": []},
-                "imdb.rating": {"$exists": True, "$ne": None}
-            }},
-            {"$unwind": "$genres"},
-            {"$group": {
-                "_id": "$genres",
-                "avg_rating": {"$avg": "$imdb.rating"},
-                "count": {"$sum": 1}
-            }},
-            {"$match": {"count": {"$gte": 50}}},
-            {"$sort": {"avg_rating": -1}},
-            {"$limit": 15}
-        ]
-        
-        genre_ratings = list(db['movies'].aggregate(pipeline))
-        genre_ratings_df = pd.DataFrame(genre_ratings)
-        genre_ratings_df.columns = ['Genre', 'Avg Rating', 'Movie Count']
+        genre_ratings_df = get_genre_ratings(db)
         
         col1, col2 = st.columns(2)
         
@@ -383,10 +735,12 @@ def show_temporal_trends(db):
     st.subheader("🎬 Movie Production by Decade")
     decade_df = get_movies_by_decade(db)
     
+    decades = decade_df['Decade'].to_numpy(dtype='int32')
+    decade_counts = decade_df['Count'].to_numpy(dtype='int32')
     fig = go.Figure()
-    fig.add_trace(go.Bar(x=decade_df['Decade'], y=decade_df['Count'],
+    fig.add_trace(go.Bar(x=decades, y=decade_counts,
                          marker_color='steelblue', name='Movies'))
-    fig.add_trace(go.Scatter(x=decade_df['Decade'], y=decade_df['Count'],
+    fig.add_trace(go.Scatter(x=decades, y=decade_counts,
                             mode='lines+markers', name='Trend',
                             line=dict(color='red', width=2)))
     fig.update_layout(height=400, xaxis_title='Decade', yaxis_title='Number of Movies')
@@ -412,18 +766,19 @@ def show_temporal_trends(db):
         {"$sort": {"_id": 1}}
     ]
     
-    rating_trend = list(db['movies'].aggregate(pipeline))
-    rating_trend_df = pd.DataFrame(rating_trend)
+    rating_trend_df = _aggregate_frame(db['movies'], pipeline,
+                                       schema={'_id': int, 'avg_rating': float, 'count': int})
     rating_trend_df.columns = ['Decade', 'Avg Rating', 'Count']
+    trend_decades = rating_trend_df['Decade'].to_numpy(dtype='int32')
     
     fig = make_subplots(specs=[[{"secondary_y": True}]])
     fig.add_trace(
-        go.Scatter(x=rating_trend_df['Decade'], y=rating_trend_df['Avg Rating'],
+        go.Scatter(x=trend_decades, y=rating_trend_df['Avg Rating'].to_numpy(dtype='float32'),
                   mode='lines+markers', name='Avg Rating', line=dict(color='green', width=3)),
         secondary_y=False
     )
     fig.add_trace(
-        go.Bar(x=rating_trend_df['Decade'], y=rating_trend_df['Count'],
+        go.Bar(x=trend_decades, y=rating_trend_df['Count'].to_numpy(dtype='int32'),
               name='Movie Count', marker_color='lightblue', opacity=0.5),
         secondary_y=True
     )
@@ -433,6 +788,16 @@ def show_temporal_trends(db):
     fig.update_layout(height=400)
     st.plotly_chart(fig, use_container_width=True)
 
+# Client-side marker factory for FastMarkerCluster rows of [lat, lon, popup]
+THEATER_MARKER_CALLBACK = """
+function (row) {
+    var marker = L.circleMarker(new L.LatLng(row[0], row[1]),
+                                {radius: 3, color: 'red', fill: true, fillColor: 'red'});
+    marker.bindPopup(row[2]);
+    return marker;
+}
+"""
+
 def show_geographic_view(db):
     """Geographic visualization page"""
     st.header("🗺️ Theater Geographic Distribution")
@@ -440,30 +805,17 @@ def show_geographic_view(db):
     st.info("Showing theater locations across the United States")
     
     # Get theater data
-    theaters = get_theater_locations(db)
+    theaters_df = get_theater_locations(db)
     
-    if theaters:
+    if not theaters_df.empty:
         # Create map centered on US
         m = folium.Map(location=[39.8283, -98.5795], zoom_start=4)
         
-        # Add markers
-        for theater in theaters[:200]:  # Limit to 200 for performance
-            if 'coordinates' in theater and theater['coordinates']:
-                coords = theater['coordinates']
-                if len(coords) >= 2:
-                    # MongoDB stores [longitude, latitude]
-                    try:
-                        lon, lat = float(coords[0]), float(coords[1])
-                        folium.CircleMarker(
-                            location=[lat, lon],
-                            radius=3,
-                            popup=f"{theater.get('city', 'Unknown')}, {theater.get('state', '')}",
-                            color='red',
-                            fill=True,
-                            fillColor='red'
-                        ).add_to(m)
-                    except:
-                        pass
+        # Add markers in one bulk payload
+        popups = (theaters_df['city'].fillna('Unknown').astype(str) + ', '
+                  + theaters_df['state'].astype(str).replace('nan', ''))
+        rows = list(zip(theaters_df['lat'].tolist(), theaters_df['lon'].tolist(), popups.tolist()))
+        FastMarkerCluster(rows, callback=THEATER_MARKER_CALLBACK).add_to(m)
         
         # Display map
         folium_static(m, width=1200, height=600)
@@ -471,27 +823,19 @@ def show_geographic_view(db):
         # State distribution
         st.subheader("📊 Theaters by State")
         
-        pipeline = [
-            {"$match": {"location.address.state": {"$exists": True}}},
-            {"$group": {"_id": "$location.address.state", "count": {"$sum": 1}}},
-            {"$sort": {"count": -1}},
-            {"$limit": 15}
-        ]
-        
-        state_data = list(db['theaters'].aggregate(pipeline))
-        state_df = pd.DataFrame(state_data).rename(columns={'_id': 'State', 'count': 'Count'})
+        state_df = theaters_df['state'].value_counts().head(15).rename_axis('State').reset_index(name='Count')
         
-        fig = px.bar(state_df, x='State', y='Count', color='Count',
-                    color_continuous_scale='reds')
+        state_counts = state_df['Count'].to_numpy(dtype='int32')
+        fig = px.bar(x=state_df['State'].to_numpy(), y=state_counts, color=state_counts,
+                    color_continuous_scale='reds',
+                    labels={'x': 'State', 'y': 'Count', 'color': 'Count'})
         fig.update_layout(height=400)
         st.plotly_chart(fig, use_container_width=True)
 
-def show_user_engagement(db):
+def show_user_engagement(db, stats):
     """User engagement page"""
     st.header("💬 User Engagement Analysis")
     
-    stats = get_overview_stats(db)
-    
     col1, col2, col3 = st.columns(3)
     with col1:
         st.metric("Total Comments", f"{stats['total_comments']:,}")
@@ -504,11 +848,14 @@ def show_user_engagement(db):
     st.markdown("---")
     
     # Comment trends
-    st.subheader("📈 Comment Activity Over Time")
+    cutoff = get_comment_trend_cutoff(db)
+    st.subheader(f"📈 Comment Activity Since {cutoff.year}" if cutoff else "📈 Comment Activity Over Time")
     comment_trends = get_comment_trends(db)
     
     if not comment_trends.empty:
-        fig = px.line(comment_trends, x='date', y='Comments',
+        fig = px.line(x=comment_trends['date'].to_numpy(),
+                     y=comment_trends['Comments'].to_numpy(dtype='int32'),
+                     labels={'x': 'date', 'y': 'Comments'},
                      title='User Comments Over Time')
         fig.update_layout(height=400)
         st.plotly_chart(fig, use_container_width=True)
@@ -516,25 +863,7 @@ def show_user_engagement(db):
     # Most commented movies
     st.subheader("🔥 Most Discussed Movies")
     
-    pipeline = [
-        {"$group": {"_id": "$movie_id", "comment_count": {"$sum": 1}}},
-        {"$sort": {"comment_count": -1}},
-        {"$limit": 10},
-        {"$lookup": {
-            "from": "movies",
-            "localField": "_id",
-            "foreignField": "_id",
-            "as": "movie_info"
-        }},
-        {"$unwind": "$movie_info"},
-        {"$project": {
-            "title": "$movie_info.title",
-            "year": "$movie_info.year",
-            "comment_count": 1
-        }}
-    ]
-    
-    most_commented = list(db['comments'].aggregate(pipeline))
+    most_commented = get_most_discussed_movies(db)
     
     if most_commented:
         for idx, movie in enumerate(most_commented, 1):
@@ -549,12 +878,14 @@ def show_search(db):
     st.header("🔍 Search Movies")
     
     # Get available genres
-    genres = ['All'] + sorted(db['movies'].distinct('genres'))
+    genres = get_genres(db)
     
     col1, col2, col3 = st.columns([2, 1, 1])
     
     with col1:
         search_query = st.text_input("Search by title", "")
+        if has_title_text_index(db):
+            st.caption("Matches whole words, e.g. \"godfather\" (partial words like \"godf\" won't match)")
     with col2:
         genre_filter = st.selectbox("Genre", genres)
     with col3:
@@ -568,17 +899,18 @@ def show_search(db):
         st.subheader(f"Found {len(results)} movies")
         
         if not results.empty:
-            for idx, row in results.iterrows():
-                with st.expander(f"{row['title']} ({row.get('year', 'N/A')})"):
-                    col1, col2 = st.columns([3, 1])
-                    with col1:
-                        st.write("**Plot:**")
-                        st.write(row.get('plot', 'No plot available'))
-                        if 'genres' in row and isinstance(row['genres'], list):
-                            st.write("**Genres:**", ', '.join(row['genres']))
-                    with col2:
-                        if 'rating' in row and row['rating']:
-                            st.metric("Rating", f"{row['rating']:.1f}/10")
+            st.dataframe(
+                results.reindex(columns=['title', 'year', 'genres', 'rating', 'plot']),
+                use_container_width=True,
+                hide_index=True,
+                column_config={
+                    'title': 'Title',
+                    'year': st.column_config.NumberColumn('Year', format="%d"),
+                    'genres': st.column_config.ListColumn('Genres'),
+                    'rating': st.column_config.NumberColumn('Rating', format="%.1f/10"),
+                    'plot': st.column_config.TextColumn('Plot', width='large')
+                }
+            )
 
 if __name__ == "__main__":
     main()